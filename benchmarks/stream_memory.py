@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Compare the peak Python memory used by `page()` and `stream_page()` when
+consuming a single large page.
+
+    python benchmarks/stream_memory.py [rows]
+"""
+import os
+import sys
+import tracemalloc
+
+import django
+from django.test.utils import setup_test_environment, setup_databases, teardown_databases
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+
+    from cursor_pagination import CursorPaginator
+    from tests.models import Post
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        Post.objects.bulk_create(Post(name='Name %s' % i) for i in range(rows))
+        paginator = CursorPaginator(Post.objects.all(), ('id',))
+
+        def consume_page():
+            for item in paginator.page(first=rows):
+                pass
+
+        def consume_stream_page():
+            for item in paginator.stream_page(first=rows):
+                pass
+
+        print('rows: %d' % rows)
+        print('page():        %8.1f KiB' % (peak_memory(consume_page) / 1024))
+        print('stream_page(): %8.1f KiB' % (peak_memory(consume_stream_page) / 1024))
+    finally:
+        teardown_databases(old_config, verbosity=0)
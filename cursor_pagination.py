@@ -1,6 +1,12 @@
+import asyncio
+import heapq
 from base64 import b64decode, b64encode
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cmp_to_key
 
+from asgiref.sync import sync_to_async
+from django.db import connections
 from django.db.models import F, Q, TextField, Value
 from django.utils.translation import gettext_lazy as _
 
@@ -37,14 +43,85 @@ class CursorPage(Sequence):
         return '<Page: [%s%s]>' % (', '.join(repr(i) for i in self.items[:21]), ' (remaining truncated)' if len(self.items) > 21 else '')
 
 
+class StreamingCursorPage(object):
+    """
+    A page whose items are fetched lazily in chunks, using server-side cursors
+    where the database supports them. Iterate with `for` or `async for`.
+
+    `has_next` and `end_cursor` are `None` until the page has been fully
+    consumed, as they depend on the sentinel row at the end of the results.
+    """
+    def __init__(self, queryset, paginator, page_size=None, has_previous=False, chunk_size=2000):
+        self.queryset = queryset
+        self.paginator = paginator
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.has_next = None
+        self.has_previous = has_previous
+        self.end_cursor = None
+
+    def _start(self):
+        self.has_next = None
+        self.end_cursor = None
+        self._count = 0
+        self._last_item = None
+
+    def _accept(self, item):
+        """
+        Record the item and return whether it belongs to the page, or is the
+        sentinel row past the end of it.
+        """
+        if self.page_size is not None and self._count >= self.page_size:
+            self.has_next = True
+            return False
+        self._count += 1
+        self._last_item = item
+        return True
+
+    def _finish(self):
+        if self.has_next is None:
+            self.has_next = False
+        if self._last_item is not None:
+            self.end_cursor = self.paginator.cursor(self._last_item)
+
+    def __iter__(self):
+        self._start()
+        for item in self.queryset.iterator(chunk_size=self.chunk_size):
+            if not self._accept(item):
+                break
+            yield item
+        self._finish()
+
+    async def __aiter__(self):
+        self._start()
+        async for item in self.queryset.aiterator(chunk_size=self.chunk_size):
+            if not self._accept(item):
+                break
+            yield item
+        self._finish()
+
+    def __repr__(self):
+        return '<StreamingPage: first=%s>' % self.page_size
+
+
 class CursorPaginator(object):
     delimiter = '|'
     none_string = '::None'
+    database_prefix = '::db='
     invalid_cursor_message = _('Invalid cursor')
 
-    def __init__(self, queryset, ordering):
+    def __init__(self, queryset, ordering, using=None, sticky_databases=None):
+        """
+        `using` routes all queries to the given database alias. When
+        `sticky_databases` is a collection of database aliases, cursors for
+        instances loaded from one of them remember that database, and pages
+        requested with such a cursor are read from the same database.
+        """
+        if using is not None:
+            queryset = queryset.using(using)
         self.queryset = queryset.order_by(*self._nulls_ordering(ordering))
         self.ordering = ordering
+        self.sticky_databases = frozenset(sticky_databases or ())
 
     def _nulls_ordering(self, ordering, from_last=False):
         """
@@ -76,6 +153,8 @@ class CursorPaginator(object):
         if from_last and first is not None:
             raise ValueError('Cannot process first and last')
 
+        qs = self.apply_cursor_database(qs, after=after, before=before)
+
         if after is not None:
             qs = self.apply_cursor(after, qs, from_last=from_last)
         if before is not None:
@@ -127,6 +206,17 @@ class CursorPaginator(object):
 
         return self._get_cursor_page(items, has_additional, first, last, after, before)
 
+    def stream_page(self, first=None, after=None, chunk_size=2000):
+        """
+        Return a page which streams its items instead of loading them all
+        into memory. Only forward pagination is supported, as backward
+        pagination needs the whole page to reverse it.
+        """
+        qs = self.queryset
+        qs = self._apply_paginator_arguments(qs, first=first, after=after)
+
+        return StreamingCursorPage(qs, self, page_size=first, has_previous=bool(after), chunk_size=chunk_size)
+
     def apply_cursor(self, cursor, queryset, from_last, reverse=False):
         position = self.decode_cursor(cursor)
 
@@ -203,25 +293,58 @@ class CursorPaginator(object):
 
         return queryset.filter(filtering)
 
-    def decode_cursor(self, cursor):
+    def apply_cursor_database(self, queryset, after=None, before=None):
+        """
+        Route the queryset to the database remembered by the cursors, if any.
+        """
+        databases = {
+            self.database_from_cursor(cursor) for cursor in (after, before) if cursor is not None
+        }
+        databases.discard(None)
+        if not databases:
+            return queryset
+        if len(databases) > 1:
+            raise InvalidCursor(self.invalid_cursor_message)
+        database = databases.pop()
+        if database not in self.sticky_databases:
+            raise InvalidCursor(self.invalid_cursor_message)
+        return queryset.using(database)
+
+    def _split_cursor(self, cursor):
         try:
-            orderings = b64decode(cursor.encode('ascii')).decode('utf8')
-            return [ordering if ordering != self.none_string else None for ordering in orderings.split(self.delimiter)]
+            orderings = b64decode(cursor.encode('ascii')).decode('utf8').split(self.delimiter)
         except (TypeError, ValueError):
             raise InvalidCursor(self.invalid_cursor_message)
+        database = None
+        if self.sticky_databases and orderings[-1].startswith(self.database_prefix):
+            database = orderings.pop()[len(self.database_prefix):]
+        return orderings, database
+
+    def decode_cursor(self, cursor):
+        orderings, _database = self._split_cursor(cursor)
+        if len(orderings) != len(self.ordering):
+            raise InvalidCursor(self.invalid_cursor_message)
+        return [ordering if ordering != self.none_string else None for ordering in orderings]
+
+    def database_from_cursor(self, cursor):
+        return self._split_cursor(cursor)[1]
 
     def encode_cursor(self, position):
         encoded = b64encode(self.delimiter.join(position).encode('utf8')).decode('ascii')
         return encoded
 
+    def value_from_instance(self, instance, order):
+        parts = order.lstrip('-').split('__')
+        attr = instance
+        while parts:
+            attr = getattr(attr, parts[0])
+            parts.pop(0)
+        return attr
+
     def position_from_instance(self, instance):
         position = []
         for order in self.ordering:
-            parts = order.lstrip('-').split('__')
-            attr = instance
-            while parts:
-                attr = getattr(attr, parts[0])
-                parts.pop(0)
+            attr = self.value_from_instance(instance, order)
             if attr is None:
                 position.append(self.none_string)
             else:
@@ -229,5 +352,185 @@ class CursorPaginator(object):
         return position
 
     def cursor(self, instance):
-        return self.encode_cursor(self.position_from_instance(instance))
+        position = self.position_from_instance(instance)
+        if instance._state.db in self.sticky_databases:
+            position.append(self.database_prefix + instance._state.db)
+        return self.encode_cursor(position)
+
+
+class MergedCursorPage(CursorPage):
+    def __init__(self, items, paginator, sources, has_next=False, has_previous=False):
+        super().__init__(items, paginator, has_next=has_next, has_previous=has_previous)
+        self.sources = sources
+
+    def _cursor(self, end=False):
+        """
+        Position every source at its first (or last) item on this page.
+        Sources without items on this page are positioned at the page edge.
+        """
+        if not self.items:
+            return None
+        pairs = list(zip(self.items, self.sources))
+        if not end:
+            pairs.reverse()
+        positions = [pairs[-1][0]] * len(self.paginator.paginators)
+        for item, source in pairs:
+            positions[source] = item
+        return self.paginator.encode_cursor([
+            paginator.cursor(item) for paginator, item in zip(self.paginator.paginators, positions)
+        ])
+
+    @property
+    def start_cursor(self):
+        return self._cursor()
+
+    @property
+    def end_cursor(self):
+        return self._cursor(end=True)
+
+
+class MergedCursorPaginator(object):
+    """
+    Paginate over several querysets with the same ordering, such as one per
+    database shard, as if they were a single queryset. Each page reads at
+    most one page from every queryset and merges the results in Python.
+
+    Querysets are read concurrently in worker threads, each with its own
+    database connections, unless there is only one queryset or
+    `max_workers` is 1.
+    """
+    delimiter = CursorPaginator.delimiter
+    none_string = CursorPaginator.none_string
+    invalid_cursor_message = CursorPaginator.invalid_cursor_message
+
+    def __init__(self, querysets, ordering, max_workers=None):
+        querysets = list(querysets)
+        if not querysets:
+            raise ValueError('At least one queryset is required')
+        # Load related objects used by the ordering up front, so that merging
+        # and building cursors does not need further queries
+        relations = ['__'.join(order.lstrip('-').split('__')[:-1]) for order in ordering if '__' in order]
+        if relations:
+            querysets = [queryset.select_related(*relations) for queryset in querysets]
+        self.paginators = [CursorPaginator(queryset, ordering) for queryset in querysets]
+        self.ordering = ordering
+        self.max_workers = max_workers
+
+    @property
+    def concurrent(self):
+        return len(self.paginators) > 1 and self.max_workers != 1
+
+    def _compare(self, a, b):
+        """
+        Compare two lists of ordering values the way the database orders
+        them, with NULL values at the end in both directions.
+        """
+        for order, x, y in zip(self.ordering, a, b):
+            if x == y:
+                continue
+            if x is None:
+                return 1
+            if y is None:
+                return -1
+            result = -1 if x < y else 1
+            return -result if order.startswith('-') else result
+        return 0
+
+    def _source_arguments(self, first, last, after, before):
+        if first is not None and last is not None:
+            raise ValueError('Cannot process first and last')
+
+        afters = self.decode_cursor(after) if after is not None else [None] * len(self.paginators)
+        befores = self.decode_cursor(before) if before is not None else [None] * len(self.paginators)
+        return [
+            dict(first=first, last=last, after=source_after, before=source_before)
+            for source_after, source_before in zip(afters, befores)
+        ]
+
+    def _get_merged_page(self, results, first, last, after, before):
+        """
+        Merge the pages of every source with a heap and create the page
+        """
+        key = cmp_to_key(self._compare)
+        pages = [page for page, values in results]
+        merged = list(heapq.merge(
+            *[
+                [(item, index, item_values) for item, item_values in zip(page, values)]
+                for index, (page, values) in enumerate(results)
+            ],
+            key=lambda triple: key(triple[2]),
+        ))
+
+        additional_kwargs = {}
+        if first is not None:
+            additional_kwargs['has_next'] = len(merged) > first or any(page.has_next for page in pages)
+            additional_kwargs['has_previous'] = bool(after)
+            merged = merged[:first]
+        elif last is not None:
+            additional_kwargs['has_previous'] = len(merged) > last or any(page.has_previous for page in pages)
+            additional_kwargs['has_next'] = bool(before)
+            merged = merged[max(len(merged) - last, 0):]
+
+        items = [item for item, index, values in merged]
+        sources = [index for item, index, values in merged]
+        return MergedCursorPage(items, self, sources, **additional_kwargs)
+
+    def _source_page(self, paginator, arguments):
+        """
+        Fetch the page of a source along with the ordering values of its items
+        """
+        page = paginator.page(**arguments)
+        values = [[paginator.value_from_instance(item, order) for order in self.ordering] for item in page]
+        return page, values
+
+    def _worker_source_page(self, paginator, arguments):
+        try:
+            return self._source_page(paginator, arguments)
+        finally:
+            # Connections are per thread, close the ones this worker opened
+            connections.close_all()
+
+    def page(self, first=None, last=None, after=None, before=None):
+        arguments = self._source_arguments(first, last, after, before)
+
+        if self.concurrent:
+            with ThreadPoolExecutor(max_workers=self.max_workers or len(self.paginators)) as executor:
+                results = list(executor.map(self._worker_source_page, self.paginators, arguments))
+        else:
+            results = [self._source_page(*source) for source in zip(self.paginators, arguments)]
+
+        return self._get_merged_page(results, first, last, after, before)
+
+    async def apage(self, first=None, last=None, after=None, before=None):
+        arguments = self._source_arguments(first, last, after, before)
+
+        if self.concurrent:
+            semaphore = asyncio.Semaphore(self.max_workers or len(self.paginators))
+
+            async def source_page(paginator, source_arguments):
+                async with semaphore:
+                    return await sync_to_async(self._worker_source_page, thread_sensitive=False)(
+                        paginator, source_arguments)
+
+            results = await asyncio.gather(*[
+                source_page(*source) for source in zip(self.paginators, arguments)
+            ])
+        else:
+            results = [
+                await sync_to_async(self._source_page)(*source) for source in zip(self.paginators, arguments)
+            ]
+
+        return self._get_merged_page(results, first, last, after, before)
+
+    def decode_cursor(self, cursor):
+        try:
+            cursors = b64decode(cursor.encode('ascii')).decode('utf8').split(self.delimiter)
+        except (TypeError, ValueError):
+            raise InvalidCursor(self.invalid_cursor_message)
+        if len(cursors) != len(self.paginators):
+            raise InvalidCursor(self.invalid_cursor_message)
+        return [cursor if cursor != self.none_string else None for cursor in cursors]
 
+    def encode_cursor(self, cursors):
+        cursors = [cursor if cursor is not None else self.none_string for cursor in cursors]
+        return b64encode(self.delimiter.join(cursors).encode('utf8')).decode('ascii')
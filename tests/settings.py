@@ -6,7 +6,15 @@ DATABASES = {
         'PASSWORD': 'postgres',
         'HOST': 'localhost',
         'PORT': '5432',
-    }
+    },
+    'replica_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'replica_1.sqlite3',
+    },
+    'replica_2': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'replica_2.sqlite3',
+    },
 }
 
 INSTALLED_APPS = ['tests']
@@ -2,10 +2,10 @@
 
 import datetime
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
-from cursor_pagination import CursorPaginator
+from cursor_pagination import CursorPaginator, InvalidCursor, MergedCursorPaginator
 
 from .models import Author, Post
 
@@ -212,6 +212,71 @@ class TestBackwardsPagination(TestCase):
         self.assertTrue(page.has_next)
 
 
+class TestStreamingPagination(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.items = []
+        for i in range(20):
+            post = Post.objects.create(name='Name %s' % i, created=now - datetime.timedelta(hours=i))
+            cls.items.append(post)
+        cls.paginator = CursorPaginator(Post.objects.all(), ('-created',))
+
+    def test_first_page(self):
+        page = self.paginator.stream_page(first=2, chunk_size=1)
+        self.assertIsNone(page.has_next)
+        self.assertIsNone(page.end_cursor)
+        self.assertSequenceEqual(list(page), [self.items[0], self.items[1]])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertEqual(page.end_cursor, self.paginator.cursor(self.items[1]))
+
+    async def test_async_first_page(self):
+        page = self.paginator.stream_page(first=2, chunk_size=1)
+        items = [item async for item in page]
+        self.assertSequenceEqual(items, [self.items[0], self.items[1]])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertEqual(page.end_cursor, self.paginator.cursor(self.items[1]))
+
+    def test_second_page(self):
+        previous_page = self.paginator.stream_page(first=2)
+        list(previous_page)
+        page = self.paginator.stream_page(first=2, after=previous_page.end_cursor)
+        self.assertSequenceEqual(list(page), [self.items[2], self.items[3]])
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_previous)
+
+    def test_incomplete_last_page(self):
+        cursor = self.paginator.cursor(self.items[17])
+        page = self.paginator.stream_page(first=100, after=cursor)
+        self.assertSequenceEqual(list(page), [self.items[18], self.items[19]])
+        self.assertFalse(page.has_next)
+        self.assertTrue(page.has_previous)
+        self.assertEqual(page.end_cursor, self.paginator.cursor(self.items[19]))
+
+    async def test_async_incomplete_last_page(self):
+        cursor = self.paginator.cursor(self.items[17])
+        page = self.paginator.stream_page(first=100, after=cursor)
+        items = [item async for item in page]
+        self.assertSequenceEqual(items, [self.items[18], self.items[19]])
+        self.assertFalse(page.has_next)
+        self.assertTrue(page.has_previous)
+
+    def test_no_first(self):
+        page = self.paginator.stream_page()
+        self.assertSequenceEqual(list(page), self.items)
+        self.assertFalse(page.has_next)
+
+    def test_empty(self):
+        paginator = CursorPaginator(Author.objects.all(), ('id',))
+        page = paginator.stream_page(first=2)
+        self.assertSequenceEqual(list(page), [])
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.end_cursor)
+
+
 class TestTwoFieldPagination(TestCase):
 
     @classmethod
@@ -384,3 +449,215 @@ class TestRelationshipsWithNull(TestCase):
         cursor = self.paginator.cursor(self.items[17])
         page = self.paginator.page(first=2, after=cursor)
         self.assertSequenceEqual(page, [self.items[19], self.items[0]])
+
+
+class TestMultipleDatabases(TestCase):
+    databases = {'default', 'replica_1', 'replica_2'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = {}
+        for database in ('replica_1', 'replica_2'):
+            cls.items[database] = []
+            for i in range(4):
+                post = Post.objects.using(database).create(name='%s %s' % (database, i))
+                cls.items[database].append(post)
+
+    def test_using(self):
+        paginator = CursorPaginator(Post.objects.all(), ('id',), using='replica_1')
+        page = paginator.page(first=2)
+        self.assertSequenceEqual([p.name for p in page], ['replica_1 0', 'replica_1 1'])
+        cursor = paginator.cursor(page[-1])
+        page = paginator.page(first=2, after=cursor)
+        self.assertSequenceEqual([p.name for p in page], ['replica_1 2', 'replica_1 3'])
+        self.assertFalse(page.has_next)
+
+    def test_sticky_cursor(self):
+        sticky_databases = ('replica_1', 'replica_2')
+        paginator = CursorPaginator(Post.objects.using('replica_2'), ('id',), sticky_databases=sticky_databases)
+        page = paginator.page(first=2)
+        cursor = paginator.cursor(page[-1])
+        self.assertEqual(paginator.database_from_cursor(cursor), 'replica_2')
+
+        paginator = CursorPaginator(Post.objects.all(), ('id',), using='replica_1', sticky_databases=sticky_databases)
+        page = paginator.page(first=2, after=cursor)
+        self.assertSequenceEqual([p.name for p in page], ['replica_2 2', 'replica_2 3'])
+        self.assertEqual(paginator.database_from_cursor(paginator.cursor(page[-1])), 'replica_2')
+
+    def test_sticky_cursor_backwards(self):
+        paginator = CursorPaginator(Post.objects.using('replica_2'), ('id',), sticky_databases=('replica_2',))
+        cursor = paginator.cursor(self.items['replica_2'][2])
+        paginator = CursorPaginator(Post.objects.all(), ('id',), sticky_databases=('replica_2',))
+        page = paginator.page(last=2, before=cursor)
+        self.assertSequenceEqual([p.name for p in page], ['replica_2 0', 'replica_2 1'])
+
+    def test_not_sticky(self):
+        paginator = CursorPaginator(Post.objects.using('replica_2'), ('id',))
+        cursor = paginator.cursor(self.items['replica_2'][1])
+        paginator = CursorPaginator(Post.objects.all(), ('id',), sticky_databases=('replica_2',))
+        self.assertIsNone(paginator.database_from_cursor(cursor))
+
+    def test_not_sticky_ignores_database_prefix(self):
+        paginator = CursorPaginator(Post.objects.all(), ('name', 'id'))
+        cursor = paginator.encode_cursor(['a', '::db=replica_1'])
+        self.assertEqual(paginator.decode_cursor(cursor), ['a', '::db=replica_1'])
+        self.assertIsNone(paginator.database_from_cursor(cursor))
+
+    def test_cursor_wrong_length(self):
+        paginator = CursorPaginator(Post.objects.all(), ('name', 'id'))
+        with self.assertRaises(InvalidCursor):
+            paginator.decode_cursor(paginator.encode_cursor(['a']))
+
+    def test_sticky_cursors_disagree(self):
+        sticky_databases = ('replica_1', 'replica_2')
+        after = CursorPaginator(Post.objects.using('replica_1'), ('id',), sticky_databases=sticky_databases).cursor(self.items['replica_1'][0])
+        before = CursorPaginator(Post.objects.using('replica_2'), ('id',), sticky_databases=sticky_databases).cursor(self.items['replica_2'][3])
+        paginator = CursorPaginator(Post.objects.all(), ('id',), sticky_databases=sticky_databases)
+        with self.assertRaises(InvalidCursor):
+            paginator.page(first=2, after=after, before=before)
+
+    def test_sticky_cursor_unknown_database(self):
+        paginator = CursorPaginator(Post.objects.using('replica_2'), ('id',), sticky_databases=('replica_2',))
+        cursor = paginator.cursor(self.items['replica_2'][1])
+        paginator = CursorPaginator(Post.objects.all(), ('id',), sticky_databases=('replica_1',))
+        with self.assertRaises(InvalidCursor):
+            paginator.page(first=2, after=cursor)
+
+
+class TestMergedPagination(TransactionTestCase):
+    # Sources are read from worker threads, so the data must be committed
+    databases = {'default', 'replica_1', 'replica_2'}
+
+    def setUp(self):
+        self.items = []
+        databases = ['default', 'replica_1', 'replica_2', 'replica_1', 'replica_1', 'default']
+        for i in range(12):
+            post = Post.objects.using(databases[i % 6]).create(name='Name %02d' % i)
+            self.items.append(post)
+        self.paginator = MergedCursorPaginator([
+            Post.objects.using(database) for database in ('default', 'replica_1', 'replica_2')
+        ], ('name',))
+
+    def assertPageEqual(self, page, items):
+        self.assertSequenceEqual([p.name for p in page], [p.name for p in items])
+
+    def test_no_args(self):
+        page = self.paginator.page()
+        self.assertPageEqual(page, self.items)
+        self.assertFalse(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_forward(self):
+        page = self.paginator.page(first=5)
+        self.assertPageEqual(page, self.items[:5])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        page = self.paginator.page(first=5, after=page.end_cursor)
+        self.assertPageEqual(page, self.items[5:10])
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_previous)
+        page = self.paginator.page(first=5, after=page.end_cursor)
+        self.assertPageEqual(page, self.items[10:])
+        self.assertFalse(page.has_next)
+
+    def test_backward(self):
+        page = self.paginator.page(last=5)
+        self.assertPageEqual(page, self.items[7:])
+        self.assertFalse(page.has_next)
+        self.assertTrue(page.has_previous)
+        page = self.paginator.page(last=5, before=page.start_cursor)
+        self.assertPageEqual(page, self.items[2:7])
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_previous)
+        page = self.paginator.page(last=5, before=page.start_cursor)
+        self.assertPageEqual(page, self.items[:2])
+        self.assertFalse(page.has_previous)
+
+    def test_change_direction(self):
+        page = self.paginator.page(first=5)
+        page = self.paginator.page(first=5, after=page.end_cursor)
+        page = self.paginator.page(last=3, before=page.start_cursor)
+        self.assertPageEqual(page, self.items[2:5])
+
+    def test_reverse_order(self):
+        paginator = MergedCursorPaginator([
+            Post.objects.using(database) for database in ('default', 'replica_1', 'replica_2')
+        ], ('-name',))
+        page = paginator.page(first=4)
+        page = paginator.page(first=4, after=page.end_cursor)
+        self.assertPageEqual(page, self.items[7:3:-1])
+
+    async def test_async_forward(self):
+        page = await self.paginator.apage(first=5)
+        self.assertPageEqual(page, self.items[:5])
+        page = await self.paginator.apage(first=5, after=page.end_cursor)
+        self.assertPageEqual(page, self.items[5:10])
+        self.assertTrue(page.has_next)
+
+    def test_empty(self):
+        paginator = MergedCursorPaginator([Author.objects.all(), Author.objects.using('replica_1')], ('name',))
+        page = paginator.page(first=2)
+        self.assertSequenceEqual(page, [])
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.end_cursor)
+
+    def test_relation_ordering(self):
+        databases = ('default', 'replica_1', 'replica_2')
+        for database in databases:
+            Post.objects.using(database).update(author=Author.objects.using(database).create(name='Ana'))
+        author = Author.objects.using('replica_2').create(name='Bob')
+        Post.objects.using('replica_2').filter(name='Name 02').update(author=author)
+        paginator = MergedCursorPaginator([Post.objects.using(database) for database in databases], ('-author__name', 'name'))
+        page = paginator.page(first=3)
+        self.assertPageEqual(page, [self.items[2], self.items[0], self.items[1]])
+        with self.assertNumQueries(0):
+            cursor = page.end_cursor
+        page = paginator.page(first=3, after=cursor)
+        self.assertPageEqual(page, self.items[3:6])
+
+    async def test_async_relation_ordering(self):
+        databases = ('default', 'replica_1', 'replica_2')
+        for database in databases:
+            author = await Author.objects.using(database).acreate(name='Ana')
+            await Post.objects.using(database).aupdate(author=author)
+        paginator = MergedCursorPaginator([Post.objects.using(database) for database in databases], ('author__name', 'name'))
+        page = await paginator.apage(first=3)
+        self.assertPageEqual(page, self.items[:3])
+        page = await paginator.apage(first=3, after=page.end_cursor)
+        self.assertPageEqual(page, self.items[3:6])
+
+    def test_no_querysets(self):
+        with self.assertRaisesMessage(ValueError, 'At least one queryset is required'):
+            MergedCursorPaginator([], ('name',))
+
+    def test_invalid_cursor(self):
+        cursor = CursorPaginator(Post.objects.all(), ('name',)).cursor(self.items[0])
+        with self.assertRaises(InvalidCursor):
+            self.paginator.page(first=2, after=cursor)
+
+
+class TestMergedPaginationSingleThread(TestCase):
+    databases = {'default', 'replica_1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = []
+        for i in range(6):
+            post = Post.objects.using(('default', 'replica_1')[i % 2]).create(name='Name %02d' % i)
+            cls.items.append(post)
+        cls.paginator = MergedCursorPaginator([
+            Post.objects.using(database) for database in ('default', 'replica_1')
+        ], ('name',), max_workers=1)
+
+    def test_forward(self):
+        page = self.paginator.page(first=4)
+        self.assertSequenceEqual([p.name for p in page], [p.name for p in self.items[:4]])
+        self.assertTrue(page.has_next)
+        page = self.paginator.page(first=4, after=page.end_cursor)
+        self.assertSequenceEqual([p.name for p in page], [p.name for p in self.items[4:]])
+        self.assertFalse(page.has_next)
+
+    async def test_async_forward(self):
+        page = await self.paginator.apage(first=4)
+        self.assertSequenceEqual([p.name for p in page], [p.name for p in self.items[:4]])
+        self.assertTrue(page.has_next)